@@ -4,6 +4,12 @@ from fastapi import status
 from fastapi.exceptions import HTTPException
 
 
+class BadRequest(HTTPException):
+    def __init__(self, detail: Any = None, status_code: int = status.HTTP_400_BAD_REQUEST,
+                 headers: dict[str, Any] | None = None):
+        super(BadRequest, self).__init__(status_code, detail, headers)
+
+
 class NotFound(HTTPException):
     def __init__(self, detail: Any = None, status_code: int = status.HTTP_404_NOT_FOUND,
                  headers: dict[str, Any] | None = None):
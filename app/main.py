@@ -1,26 +1,39 @@
+import asyncio
+from collections import OrderedDict
 from contextlib import asynccontextmanager
-from functools import cache
+from functools import lru_cache
+from functools import wraps
+from hashlib import blake2b
+from inspect import signature
 from pathlib import Path
+from threading import Lock
+from time import sleep
+from time import time
+from typing import Annotated
 from typing import Any
 from typing import Callable
 from typing import Coroutine
 from urllib.robotparser import RobotFileParser
 
+import anyio.to_thread
 import faapi
+import orjson
 import requests
+from fastapi import APIRouter
+from fastapi import Depends
 from fastapi import FastAPI
 from fastapi import Request
 from fastapi import Response
 from fastapi import status
 from fastapi.exceptions import HTTPException
-from fastapi.responses import HTMLResponse
-from fastapi.responses import ORJSONResponse
 from fastapi.responses import RedirectResponse
-from fastapi.staticfiles import StaticFiles
 from requests import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.httpsredirect import HTTPSRedirectMiddleware
 
 from .__version__ import __version__
 from .description import description
+from .exceptions import BadRequest
 from .exceptions import DisallowedPath
 from .exceptions import NotFound
 from .exceptions import ParsingError
@@ -35,16 +48,17 @@ from .models import SubmissionsFolder
 from .models import User
 from .models import Watchlist
 from .models import serialise_object
+from .responses import CachedStaticFiles
+from .responses import FAAPIResponse
+from .responses import SelectiveGZipMiddleware
+from .responses import serialise_flat_comments
 
 root_folder: Path = Path(__file__).parent.parent
 static_folder: Path = root_folder / "static"
 
-robots: RobotFileParser = faapi.connection.get_robots(faapi.connection.make_session(
-    [{"name": "a", "value": "0"}],
-    Session
-))
-robots_serialised: dict = serialise_object(robots)
-faapi.connection.get_robots = lambda *_: robots
+robots_session: Session = faapi.connection.make_session([{"name": "a", "value": "0"}], Session)
+robots: RobotFileParser = faapi.connection.get_robots(robots_session)
+robots_json: bytes = orjson.dumps(robots, default=serialise_object)
 
 tag_subs: str = "Submissions"
 tag_jrns: str = "Journals"
@@ -63,6 +77,10 @@ responses: dict[int | str, dict[str, Any]] = {
     status.HTTP_500_INTERNAL_SERVER_ERROR: {"description": "Server Error", "model": Error},
 }
 
+responses_range: dict[int | str, dict[str, Any]] = {
+    status.HTTP_400_BAD_REQUEST: {"description": "Bad Request", "model": Error},
+}
+
 badge: dict[str, str | int] = {
     "schemaVersion": 1,
     "label": "furaffinity-api",
@@ -70,42 +88,230 @@ badge: dict[str, str | int] = {
     "color": "#FAAF3A",
     "logoSvg": (static_folder / "logo.svg").read_text()
 }
+badge_bytes: bytes = orjson.dumps(badge)
+
+badge_cache_size: int = 256
+badge_cache_ttl: int = 3600
+
+documentation_swagger: bytes = (root_folder / "docs" / "swagger.html").read_bytes()
+documentation_redoc: bytes = (root_folder / "docs" / "redoc.html").read_bytes()
+
+cache_max_age: int = 3600
+static_max_age: int = 86400
+
+gzip_minimum_size: int = 1024
+gzip_level: int = 5
+
+
+class Client(faapi.FAAPI):
+    """
+    faapi.FAAPI client that can be shared by concurrent requests while still respecting the crawl delay
+    """
+
+    last_get: float
+    # faapi sets the same user agent on every session, so the robots.txt lookups for it only need to be done once
+    user_agent: str = robots_session.headers["User-Agent"]
+    crawl_delay: float = float(robots.crawl_delay(user_agent) or 1)
+
+    def __init__(self, cookies: list[dict[str, str]]):
+        # faapi.FAAPI.__init__ is not called, as it would fetch and parse robots.txt again for every new client
+        self.session: Session = faapi.connection.make_session(cookies, Session)
+        self.robots: RobotFileParser = robots
+        self.last_get = time() - self.crawl_delay
+        self.raise_for_unauthorized: bool = True
+        self.timeout: int | None = None
+        self.delay_lock: Lock = Lock()
+
+    def handle_delay(self) -> None:
+        with self.delay_lock:
+            now: float = time()
+            self.last_get = max(now, self.last_get + self.crawl_delay)
+            delay: float = self.last_get - now
+        if delay > 0:
+            sleep(delay)
+
+    async def throttle(self) -> None:
+        """
+        Wait on the event loop until the crawl delay allows a new request, so worker threads do not sleep through it
+        """
+        if (delay := self.last_get + self.crawl_delay - time()) > 0:
+            await asyncio.sleep(delay)
+
+
+username_translation: dict[int, int | None] = str.maketrans("", "", "_")
+
+api_pool: OrderedDict[str, Client] = OrderedDict()
+api_pool_size: int = 256
+api_pool_lock: Lock = Lock()
+
+folder_range_limit: int = 10
+
+threadpool_size: int = 64
 
-documentation_swagger: str = (root_folder / "docs" / "swagger.html").read_text()
-documentation_redoc: str = (root_folder / "docs" / "redoc.html").read_text()
+inflight: dict[tuple[Any, ...], asyncio.Task[Any]] = {}
+
+
+def constant_route(content: bytes, media_type: str, max_age: int) -> Callable[[Request], Response]:
+    """
+    Build a route that always serves the same content, answering 304 when the client already has it. Only the body
+    and headers are shared between requests. The ETag is weak because SelectiveGZipMiddleware may change the content
+    coding.
+    """
+    etag: str = f'"{blake2b(content, digest_size=8).hexdigest()}"'
+    headers: dict[str, str] = {
+        "ETag": f"W/{etag}",
+        "Cache-Control": f"public, max-age={max_age}"
+    }
+
+    def route(request: Request) -> Response:
+        if_none_match: set[str] = {t.strip().removeprefix("W/")
+                                   for t in request.headers.get("If-None-Match", "").split(",")}
+        if "*" in if_none_match or etag in if_none_match:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content, media_type=media_type, headers=headers)
+
+    return route
+
+
+def redirect_route(url: str, status_code: int = status.HTTP_307_TEMPORARY_REDIRECT) -> Callable[[Request], Response]:
+    """
+    Build a route that always redirects to the same URL.
+    """
+    headers: dict[str, str] = {"Location": url}
+    return lambda r: Response(status_code=status_code, headers=headers)
 
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = threadpool_size
     _app.openapi()
     _app.openapi_schema["info"]["x-logo"] = {"url": "/static/logo.png"}
+    _app.add_route("/openapi.json", constant_route(orjson.dumps(_app.openapi_schema), "application/json",
+                                                   cache_max_age), ["GET"])
     yield
 
+
+submissions_router: APIRouter = APIRouter(tags=[tag_subs], responses=responses)
+journals_router: APIRouter = APIRouter(tags=[tag_jrns], responses=responses)
+users_router: APIRouter = APIRouter(tags=[tag_usrs], responses=responses)
+
 app: FastAPI = FastAPI(title="Fur Affinity API", servers=[{"url": "https://furaffinity-api.herokuapp.com"}],
                        version=__version__, openapi_tags=tags, description=description,
                        license_info={"name": "European Union Public Licence v. 1.2", "url": "https://eupl.eu/1.2/en"},
-                       docs_url=None, redoc_url=None, lifespan=lifespan)
-app.add_route("/docs", lambda r: HTMLResponse(documentation_swagger), ["GET"])
-app.add_route("/redoc", lambda r: HTMLResponse(documentation_redoc), ["GET"])
-app.add_route("/", lambda r: RedirectResponse("/docs"), ["GET"])
-app.add_route("/license", lambda r: RedirectResponse("https://eupl.eu/1.2/en"), ["GET"])
-app.add_route("/robots.json", lambda r: ORJSONResponse(robots_serialised), ["GET"])
-app.mount("/static", StaticFiles(directory=static_folder), "static")
+                       openapi_url=None, docs_url=None, redoc_url=None, default_response_class=FAAPIResponse,
+                       lifespan=lifespan)
+app.add_route("/docs", constant_route(documentation_swagger, "text/html", cache_max_age), ["GET"])
+app.add_route("/redoc", constant_route(documentation_redoc, "text/html", cache_max_age), ["GET"])
+app.add_route("/", redirect_route("/docs"), ["GET"])
+app.add_route("/license", redirect_route("https://eupl.eu/1.2/en"), ["GET"])
+app.add_route("/robots.json", constant_route(robots_json, "application/json", cache_max_age), ["GET"])
+app.add_route("/badge/json", constant_route(badge_bytes, "application/json", cache_max_age), ["GET"], "badge_json")
+badge_endpoint: str = app.servers[0]["url"] + app.url_path_for("badge_json")
+app.add_route("/favicon.ico", redirect_route("/static/favicon.ico", status.HTTP_301_MOVED_PERMANENTLY), ["GET"])
+for touch_icon_path in ("/icon.png", "/touch-icon.png", "/apple-touch-icon.png", "/apple-touch-icon-precomposed.png"):
+    app.add_route(touch_icon_path, redirect_route("/static/logo.png", status.HTTP_301_MOVED_PERMANENTLY), ["GET"])
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=gzip_minimum_size, compresslevel=gzip_level,
+                   exclude_prefixes=("/static/",))
+app.add_middleware(HTTPSRedirectMiddleware)
+app.mount("/static", CachedStaticFiles(directory=static_folder, max_age=static_max_age), "static")
+
+
+async def normalise_username(username: str) -> str:
+    return username.translate(username_translation) if "_" in username else username
+
+
+Username = Annotated[str, Depends(normalise_username)]
+
+
+def get_api(body: Body) -> Client:
+    """
+    Get a pooled client for the body's cookies, so its session and open connections are reused across requests.
+    """
+    cookies_id: str = body.cookies_id()
+    with api_pool_lock:
+        if (api := api_pool.get(cookies_id)) is None:
+            api = api_pool[cookies_id] = Client(body.cookies_list())
+            while len(api_pool) > api_pool_size:
+                api_pool.popitem(last=False)
+        else:
+            api_pool.move_to_end(cookies_id)
+    return api
+
+
+async def get_folder_range(body: Body, folder: Callable[..., tuple[list[Any], int | None]], username: str,
+                           start: int, end: int) -> dict[str, Any]:
+    """
+    Fetch consecutive pages of a folder in a single request, stopping early at the folder's last page.
+    """
+    if not 0 < start <= end or end - start >= folder_range_limit:
+        raise BadRequest(f"Page range must be ascending, start from 1 and span at most {folder_range_limit} pages")
+    api: Client = get_api(body)
+    results: list[Any] = []
+    next_page: int | None = None
+    for page in range(start, end + 1):
+        await api.throttle()
+        r, next_page = await run_in_threadpool(folder, api, username, page)
+        results.extend(r)
+        if not next_page:
+            break
+    return {"results": results, "next": next_page or None}
+
+
+async def singleflight(key: tuple[Any, ...], coro_factory: Callable[[], Coroutine[Any, Any, Any]]) -> Any:
+    """
+    Run coro_factory once for all concurrent callers with the same key. The key is released when the fetch is done,
+    so neither results nor failures outlive it.
+    """
+    if (task := inflight.get(key)) is None:
+        task = inflight[key] = asyncio.create_task(coro_factory())
+        task.add_done_callback(lambda _: inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+def fa_endpoint(func: Callable[..., Response]) -> Callable[..., Coroutine[Any, Any, Response]]:
+    """
+    Turn a function taking the client as first argument into an endpoint. The pooled client for the body's cookies
+    is fetched, the crawl delay awaited and the function run in the threadpool. Identical concurrent requests with the
+    same cookies share one run and its encoded body, each gets its own Response as middlewares edit the headers.
+    """
+    func_signature = signature(func)
+
+    @wraps(func)
+    async def endpoint(body: Body, **kwargs: Any) -> Response:
+        async def fetch() -> Response:
+            api: Client = get_api(body)
+            await api.throttle()
+            return await run_in_threadpool(func, api, body, **kwargs)
 
+        key: tuple[Any, ...] = (func, body.cookies_id(), body.bbcode, body.flat_comments, *kwargs.values())
+        shared: Response = await singleflight(key, fetch)
+        response: Response = Response(shared.body, shared.status_code)
+        response.raw_headers = [*shared.raw_headers]
+        return response
 
-@cache
-def get_badge(endpoint: str, query_params: str) -> Response:
+    setattr(endpoint, "__signature__", func_signature.replace(parameters=[*func_signature.parameters.values()][1:]))
+    return endpoint
+
+
+@lru_cache(maxsize=badge_cache_size)
+def get_badge(endpoint: str, query_params: str, _ttl_hash: int) -> tuple[bytes, int, str | None]:
+    """
+    Fetch a badge from shields.io, _ttl_hash changes every badge_cache_ttl seconds to expire the cached badges.
+    """
     res: requests.Response = requests.request("GET", f"https://img.shields.io/endpoint?url={endpoint}&{query_params}")
-    return Response(
-        res.content,
-        res.status_code,
-        media_type=res.headers.get("Content-Type", None)
-    )
+    return res.content, res.status_code, res.headers.get("Content-Type", None)
+
+
+def error_detail(err: Exception) -> tuple[Any, ...]:
+    """
+    Name the faapi exception together with its message, if it has one.
+    """
+    return (err.__class__.__name__, err.args[0]) if err.args else (err.__class__.__name__,)
 
 
 @app.exception_handler(HTTPException)
 def handle_http_exception(_request: Request, err: HTTPException):
-    return ORJSONResponse({"detail": err.detail}, err.status_code)
+    return Response(orjson.dumps({"detail": err.detail}), err.status_code, media_type="application/json")
 
 
 # noinspection PyTypeChecker
@@ -120,14 +326,14 @@ def handle_notice_message(_request: Request, err: Exception | faapi.exceptions.P
 @app.exception_handler(faapi.exceptions.DisabledAccount)
 @app.exception_handler(faapi.exceptions.NotFound)
 def handle_server_error(_request: Request, err: faapi.exceptions.ParsingError):
-    return handle_http_exception(_request, NotFound([err.__class__.__name__, *err.args[0:1]]))
+    return handle_http_exception(_request, NotFound(error_detail(err)))
 
 
 # noinspection PyTypeChecker
 @app.exception_handler(faapi.exceptions.NoTitle)
 @app.exception_handler(faapi.exceptions.NonePage)
 def handle_parsing_errors(_request: Request, err: faapi.exceptions.ParsingError):
-    return handle_http_exception(_request, ParsingError([err.__class__.__name__, *err.args[0:1]]))
+    return handle_http_exception(_request, ParsingError(error_detail(err)))
 
 
 # noinspection PyTypeChecker
@@ -136,179 +342,169 @@ def handle_disallowed_path(_request: Request, err: faapi.exceptions.DisallowedPa
     return handle_http_exception(_request, DisallowedPath(err.args[0] if err.args else None))
 
 
-@app.middleware("http")
-async def redirect_https(request: Request, call_next: Callable[[Request], Coroutine[Any, Any, Response]]):
-    if request.url.scheme.lower() == "http":
-        return RedirectResponse("https" + str(request.url).removeprefix("http"))
-    else:
-        return await call_next(request)
-
-
-@app.get("/badge/json", response_class=ORJSONResponse, include_in_schema=False)
-def badge_json():
-    return badge
-
-
 @app.get("/badge/svg", response_class=Response, include_in_schema=False)
 def badge_svg(request: Request):
-    return get_badge("https://furaffinity-api.herokuapp.com" + app.url_path_for(badge_json.__name__),
-                     str(request.query_params))
-
-
-@app.get("/favicon.ico", response_class=RedirectResponse, include_in_schema=False)
-async def serve_favicon():
-    return RedirectResponse("/static/favicon.ico", 301)
-
-
-@app.get("/icon.png", response_class=RedirectResponse, include_in_schema=False)
-@app.get("/touch-icon.png", response_class=RedirectResponse, include_in_schema=False)
-@app.get("/apple-touch-icon.png", response_class=RedirectResponse, include_in_schema=False)
-@app.get("/apple-touch-icon-precomposed.png", response_class=RedirectResponse, include_in_schema=False)
-async def serve_touch_icon():
-    return RedirectResponse("/static/logo.png", 301)
+    content, status_code, media_type = get_badge(
+        badge_endpoint,
+        str(request.query_params),
+        int(time() // badge_cache_ttl)
+    )
+    return Response(content, status_code, media_type=media_type)
 
 
-@app.post("/frontpage/", response_model=list[SubmissionPartial], response_class=ORJSONResponse, responses=responses,
-          tags=[tag_subs])
-async def get_frontpage(body: Body):
+@submissions_router.post("/frontpage/", response_model=list[SubmissionPartial])
+@fa_endpoint
+def get_frontpage(api: Client, body: Body):
     """
     Get the most recent submissions.
     """
-    results = (api := faapi.FAAPI(body.cookies_list())).frontpage()
-    api.handle_delay()
-    return [dict(r) for r in results]
+    return FAAPIResponse(api.frontpage())
 
 
-@app.post("/submission/{submission_id}/",
-          response_model=Submission, response_class=ORJSONResponse, responses=responses, tags=[tag_subs])
-async def get_submission(submission_id: int, body: Body):
+@submissions_router.post("/submission/{submission_id}/", response_model=Submission)
+@fa_endpoint
+def get_submission(api: Client, body: Body, submission_id: int):
     """
     Get a submission
     """
-    results = (api := faapi.FAAPI(body.cookies_list())).submission(submission_id)[0]
+    results = api.submission(submission_id)[0]
     if body.bbcode:
         results.description = results.description_bbcode
-    api.handle_delay()
-    return dict(results)
+    if body.flat_comments:
+        return FAAPIResponse(serialise_flat_comments(results))
+    return FAAPIResponse(results)
 
 
-@app.post("/submission/{submission_id}/file/",
-          response_class=RedirectResponse, status_code=302, responses=responses, tags=[tag_subs])
-async def get_submission_file(submission_id: int, body: Body):
+@submissions_router.post("/submission/{submission_id}/file/", response_class=RedirectResponse, status_code=302)
+@fa_endpoint
+def get_submission_file(api: Client, body: Body, submission_id: int):
     """
     Redirect to a submission's file URL
     """
-    results = (api := faapi.FAAPI(body.cookies_list())).submission(submission_id)[0]
-    api.handle_delay()
-    return RedirectResponse(results.file_url, status.HTTP_303_SEE_OTHER)
+    return RedirectResponse(api.submission(submission_id)[0].file_url, status.HTTP_303_SEE_OTHER)
 
 
-@app.post("/journal/{journal_id}/", response_model=Journal, response_class=ORJSONResponse, responses=responses,
-          tags=[tag_jrns])
-async def get_journal(journal_id: int, body: Body):
+@journals_router.post("/journal/{journal_id}/", response_model=Journal)
+@fa_endpoint
+def get_journal(api: Client, body: Body, journal_id: int):
     """
     Get a journal
     """
-    results = (api := faapi.FAAPI(body.cookies_list())).journal(journal_id)
-    api.handle_delay()
+    results = api.journal(journal_id)
     if body.bbcode:
         results.content = results.content_bbcode
         results.header = results.header_bbcode
         results.footer = results.footer_bbcode
-    return dict(results)
+    if body.flat_comments:
+        return FAAPIResponse(serialise_flat_comments(results))
+    return FAAPIResponse(results)
 
 
-@app.post("/me/", response_model=User, response_class=ORJSONResponse, responses=responses, tags=[tag_usrs])
-async def get_login_user(body: Body):
+@users_router.post("/me/", response_model=User)
+@fa_endpoint
+def get_login_user(api: Client, body: Body):
     """
     Get the logged-in user's details, profile text, etc. The username may contain underscore (_) characters
     """
-    results = (api := faapi.FAAPI(body.cookies_list())).me()
+    results = api.me()
     if body.bbcode:
         results.profile = results.profile_bbcode
-    api.handle_delay()
-    return dict(results)
+    return FAAPIResponse(results)
 
 
-@app.post("/user/{username}/", response_model=User, response_class=ORJSONResponse, responses=responses, tags=[tag_usrs])
-async def get_user(username: str, body: Body):
+@users_router.post("/user/{username}/", response_model=User)
+@fa_endpoint
+def get_user(api: Client, body: Body, username: Username):
     """
     Get a user's details, profile text, etc. The username may contain underscore (_) characters
     """
-    results = (api := faapi.FAAPI(body.cookies_list())).user(username.replace("_", ""))
+    results = api.user(username)
     if body.bbcode:
         results.profile = results.profile_bbcode
-    api.handle_delay()
-    return dict(results)
+    return FAAPIResponse(results)
 
 
-@app.post("/user/{username}/watchlist/by/{page}/", response_model=Watchlist, response_class=ORJSONResponse,
-          responses=responses, tags=[tag_usrs])
-async def get_user_watchlist_by(username: str, page: int, body: Body):
+@users_router.post("/user/{username}/watchlist/by/{page}/", response_model=Watchlist)
+@fa_endpoint
+def get_user_watchlist_by(api: Client, body: Body, username: Username, page: int):
     """
     Get a list of users watched by {username}
     """
-    r, n = (api := faapi.FAAPI(body.cookies_list())).watchlist_by(username.replace("_", ""), page)
-    api.handle_delay()
-    return {"results": [dict(u) for u in r], "next": n or None}
+    r, n = api.watchlist_by(username, page)
+    return FAAPIResponse({"results": r, "next": n or None})
 
 
-@app.post("/user/{username}/watchlist/to/{page}/", response_model=Watchlist, response_class=ORJSONResponse,
-          responses=responses, tags=[tag_usrs])
-async def get_user_watchlist_to(username: str, page: int, body: Body):
+@users_router.post("/user/{username}/watchlist/to/{page}/", response_model=Watchlist)
+@fa_endpoint
+def get_user_watchlist_to(api: Client, body: Body, username: Username, page: int):
     """
     Get a list of users watching {username}
     """
-    r, n = (api := faapi.FAAPI(body.cookies_list())).watchlist_to(username.replace("_", ""), page)
-    api.handle_delay()
-    return {"results": [dict(u) for u in r], "next": n or None}
+    r, n = api.watchlist_to(username, page)
+    return FAAPIResponse({"results": r, "next": n or None})
 
 
-@app.post("/user/{username}/gallery/{page}/",
-          response_model=SubmissionsFolder, response_class=ORJSONResponse, responses=responses,
-          tags=[tag_usrs, tag_subs])
-async def get_gallery(username: str, page: int, body: Body):
+@users_router.post("/user/{username}/gallery/{page}/", response_model=SubmissionsFolder, tags=[tag_subs])
+@fa_endpoint
+def get_gallery(api: Client, body: Body, username: Username, page: int):
     """
     Get a list of submissions from the user's gallery folder.
     """
-    r, n = (api := faapi.FAAPI(body.cookies_list())).gallery(username.replace("_", ""), page)
-    api.handle_delay()
-    return {"results": [dict(s) for s in r], "next": n or None}
+    r, n = api.gallery(username, page)
+    return FAAPIResponse({"results": r, "next": n or None})
 
 
-@app.post("/user/{username}/scraps/{page}/",
-          response_model=SubmissionsFolder, response_class=ORJSONResponse, responses=responses,
-          tags=[tag_usrs, tag_subs])
-async def get_scraps(username: str, page: int, body: Body):
+@users_router.post("/user/{username}/scraps/{page}/", response_model=SubmissionsFolder, tags=[tag_subs])
+@fa_endpoint
+def get_scraps(api: Client, body: Body, username: Username, page: int):
     """
     Get a list of submissions from the user's scraps folder.
     """
-    r, n = (api := faapi.FAAPI(body.cookies_list())).scraps(username.replace("_", ""), page)
-    api.handle_delay()
-    return {"results": [dict(s) for s in r], "next": n or None}
+    r, n = api.scraps(username, page)
+    return FAAPIResponse({"results": r, "next": n or None})
 
 
-@app.post("/user/{username}/favorites/{page:path}",
-          response_model=SubmissionsFolder, response_class=ORJSONResponse, responses=responses,
-          tags=[tag_usrs, tag_subs])
-async def get_favorites(username: str, page: str, body: Body):
+@users_router.post("/user/{username}/gallery/range/{start}-{end}/", response_model=SubmissionsFolder,
+                   responses=responses_range, tags=[tag_subs])
+async def get_gallery_range(username: Username, start: int, end: int, body: Body):
+    """
+    Get the submissions from a range of consecutive pages of the user's gallery folder.
+    """
+    return FAAPIResponse(await get_folder_range(body, Client.gallery, username, start, end))
+
+
+@users_router.post("/user/{username}/scraps/range/{start}-{end}/", response_model=SubmissionsFolder,
+                   responses=responses_range, tags=[tag_subs])
+async def get_scraps_range(username: Username, start: int, end: int, body: Body):
+    """
+    Get the submissions from a range of consecutive pages of the user's scraps folder.
+    """
+    return FAAPIResponse(await get_folder_range(body, Client.scraps, username, start, end))
+
+
+@users_router.post("/user/{username}/favorites/{page:path}", response_model=SubmissionsFolder, tags=[tag_subs])
+@fa_endpoint
+def get_favorites(api: Client, body: Body, username: Username, page: str):
     """
     Get a list of submissions from the user's favorites folder. Starting page should be 0 or '/'.
     """
-    r, n = (api := faapi.FAAPI(body.cookies_list())).favorites(username.replace("_", ""), page)
-    api.handle_delay()
-    return {"results": [dict(s) for s in r], "next": n or None}
+    r, n = api.favorites(username, page)
+    return FAAPIResponse({"results": r, "next": n or None})
 
 
-@app.post("/user/{username}/journals/{page}/",
-          response_model=JournalsFolder, response_class=ORJSONResponse, responses=responses, tags=[tag_usrs, tag_jrns])
-async def get_journals(username: str, page: int, body: Body):
+@users_router.post("/user/{username}/journals/{page}/", response_model=JournalsFolder, tags=[tag_jrns])
+@fa_endpoint
+def get_journals(api: Client, body: Body, username: Username, page: int):
     """
     Get a list of journals from the user's journals folder.
     """
-    rs, n = (api := faapi.FAAPI(body.cookies_list())).journals(username.replace("_", ""), page)
+    rs, n = api.journals(username, page)
     if body.bbcode:
         for r in rs:
             r.content = r.content_bbcode
-    api.handle_delay()
-    return {"results": [dict(j) for j in rs], "next": n or None}
+    return FAAPIResponse({"results": rs, "next": n or None})
+
+
+app.include_router(submissions_router)
+app.include_router(journals_router)
+app.include_router(users_router)
@@ -1,10 +1,12 @@
 from __future__ import annotations
 from datetime import datetime
-from hashlib import sha1
+from hashlib import blake2b
 from typing import Any
 
+import orjson
 from pydantic import BaseModel
 from pydantic import Field
+from pydantic import PrivateAttr
 
 from .exceptions import Unauthorized
 
@@ -26,12 +28,19 @@ class Body(BaseModel):
     """
     cookies: list[Cookie] = Field(description="A list of cookies to use to authenticate the request")
     bbcode: bool = Field(description="Set to true to return text fields in BBCode format", default=False)
+    flat_comments: bool = Field(description="Set to true to return comments as a flat list ordered by ID, "
+                                            "with replies linked only by reply_to", default=False)
+
+    _cookies_id: str | None = PrivateAttr(None)
 
     def cookies_list(self) -> list[dict[str, str]]:
         return [c.to_dict() for c in self.cookies]
 
     def cookies_id(self) -> str:
-        return sha1("".join(f"{c.name}={c.value}" for c in self.cookies).encode()).hexdigest()
+        if self._cookies_id is None:
+            self._cookies_id = blake2b(orjson.dumps([[c.name, c.value] for c in self.cookies]),
+                                       digest_size=20).hexdigest()
+        return self._cookies_id
 
     def raise_for_unauthorized(self) -> None:
         if not self.cookies:
@@ -55,6 +64,8 @@ class UserStats(BaseModel):
     comments_earned: int = Field(description="Number of comments earned")
     comments_made: int = Field(description="Number of comments made")
     journals: int = Field(description="Number of journals")
+    watched_by: int = Field(description="Number of users watching the user")
+    watching: int = Field(description="Number of users watched by the user")
 
 
 class UserPartial(BaseModel):
@@ -88,7 +99,6 @@ class User(BaseModel):
     blocked_toggle_link: str | None = Field(description="Link to toggle block status of the user")
 
 
-# noinspection PyRedeclaration
 class Comment(BaseModel):
     """
     Comment information and text
@@ -103,9 +113,6 @@ class Comment(BaseModel):
     hidden: bool = Field(description="Whether the comment is hidden")
 
 
-Comment.update_forward_refs()
-
-
 class SubmissionStats(BaseModel):
     """
     Submission statistics
@@ -223,16 +230,15 @@ class Watchlist(BaseModel):
 
 
 def serialise_object(obj: object) -> Any:
-    if obj is None:
-        return obj
-    elif isinstance(obj, (str, int, float, bool)):
-        return obj
-    elif isinstance(obj, (tuple, list)):
-        return list(map(serialise_object, obj))
-    elif isinstance(obj, dict):
-        return {k: serialise_object(v) for k, v in obj.items()}
+    """
+    Default hook for orjson.dumps, called only for the objects orjson cannot serialise natively
+    """
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    elif isinstance(obj, tuple):
+        return list(obj)
     elif hasattr(obj, "__dict__"):
-        return {k: serialise_object(v) for k, v in obj.__dict__.items()}
+        return obj.__dict__
     elif hasattr(obj, "__str__"):
         return str(obj)
     else:
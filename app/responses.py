@@ -0,0 +1,103 @@
+from os import PathLike
+from os import stat_result
+from typing import Any
+
+import faapi
+import orjson
+from fastapi.responses import ORJSONResponse
+from fastapi.responses import Response
+from fastapi.staticfiles import StaticFiles
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+
+faapi_types: frozenset[type] = frozenset({faapi.Submission, faapi.SubmissionPartial, faapi.Journal,
+                                          faapi.JournalPartial, faapi.User, faapi.UserPartial})
+
+
+def strip_comments_parent(comments: list[dict[str, Any]]) -> None:
+    """
+    Remove the parent key faapi adds to each comment and reply, it is not part of the Comment schema.
+    """
+    stack: list[dict[str, Any]] = [*comments]
+    while stack:
+        comment: dict[str, Any] = stack.pop()
+        comment.pop("parent", None)
+        stack.extend(comment["replies"])
+
+
+def serialise_faapi(obj: Any) -> dict[str, Any]:
+    if (obj_type := type(obj)) in faapi_types:
+        obj_dict: dict[str, Any] = dict(obj)
+        if obj_type is faapi.Submission or obj_type is faapi.Journal:
+            strip_comments_parent(obj_dict["comments"])
+        return obj_dict
+    raise TypeError(f"Type is not JSON serializable: {obj.__class__.__name__}")
+
+
+def serialise_comment_flat(comment: Any) -> dict[str, Any]:
+    return {
+        "id": comment.id,
+        "author": dict(comment.author),
+        "date": comment.date,
+        "text": comment.text,
+        "replies": [],
+        "reply_to": comment.reply_to.id if isinstance(comment.reply_to, faapi.Comment) else comment.reply_to,
+        "edited": comment.edited,
+        "hidden": comment.hidden,
+    }
+
+
+def serialise_flat_comments(obj: Any) -> dict[str, Any]:
+    """
+    Convert a submission or journal to a dictionary with its comments in a flat list ordered by ID, replies are
+    linked only through reply_to. The object's comments are emptied to skip faapi's nested sorting.
+    """
+    comments: list[Any] = faapi.comment.flatten_comments(obj.comments)
+    obj.comments = []
+    return dict(obj) | {"comments": [serialise_comment_flat(c) for c in comments]}
+
+
+class FAAPIResponse(ORJSONResponse):
+    """
+    JSON response that encodes faapi objects directly, without first converting the content to dictionaries
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=serialise_faapi, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    Static files served with a Cache-Control header, revalidation is left to StaticFiles' ETag and Last-Modified
+    """
+
+    def __init__(self, *args: Any, max_age: int, **kwargs: Any):
+        super(CachedStaticFiles, self).__init__(*args, **kwargs)
+        self.cache_control: str = f"public, max-age={max_age}"
+
+    def file_response(self, full_path: PathLike[str] | str, stat: stat_result, scope: Scope,
+                      status_code: int = 200) -> Response:
+        response: Response = super(CachedStaticFiles, self).file_response(full_path, stat, scope, status_code)
+        response.headers["Cache-Control"] = self.cache_control
+        return response
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that leaves the paths under the given prefixes uncompressed, so static files keep their strong
+    ETags and already-compressed images are not compressed again
+    """
+
+    def __init__(self, app: ASGIApp, *args: Any, exclude_prefixes: tuple[str, ...] = (), **kwargs: Any):
+        super(SelectiveGZipMiddleware, self).__init__(app, *args, **kwargs)
+        self.exclude_prefixes: tuple[str, ...] = exclude_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+        else:
+            await super(SelectiveGZipMiddleware, self).__call__(scope, receive, send)